@@ -3,10 +3,14 @@ from .miner import (
     fetch_and_save_all_pages_concurrently,
     fetch_and_save_all_pages_linearly,
     fetch_page,
+    get_file_path_for_page,
     get_last_page,
+    get_meta_path_for_page,
     get_page_from_url,
+    get_session,
     get_url_for_page,
     save_page,
+    write_page,
 )
 
 __all__ = [
@@ -14,8 +18,12 @@ __all__ = [
     "fetch_and_save_all_pages_concurrently",
     "fetch_and_save_all_pages_linearly",
     "fetch_page",
+    "get_file_path_for_page",
     "get_last_page",
+    "get_meta_path_for_page",
     "get_page_from_url",
+    "get_session",
     "get_url_for_page",
     "save_page",
+    "write_page",
 ]
@@ -1,4 +1,5 @@
 import argparse
+import logging
 import sys
 from pathlib import Path
 
@@ -47,6 +48,25 @@ if __name__ == "__main__":
         help="Should all pages be fetched concurrently?",
         dest="threaded",
     )
+    parser.add_argument(
+        "--async",
+        action="store_true",
+        default=False,
+        required=False,
+        help="Fetch all pages concurrently on a single asyncio event loop.",
+        dest="async_",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        action="store",
+        default=16,
+        type=int,
+        required=False,
+        help="The maximum amount of pages fetched at the same time in "
+             "threaded or async mode.",
+        dest="workers",
+    )
     parser.add_argument(
         "-s",
         "--silent",
@@ -58,24 +78,42 @@ if __name__ == "__main__":
     )
 
     args = parser.parse_args()
-    miner.set_verbose(not args.silent)  # type: ignore
-    # mypy bug, shows missing attribute of miner although it's there.
-    # Happened multiple times, therefore multiple `# type: ignore` lines.
+    if args.async_ and args.only_new_pages:
+        parser.error("--async can't be combined with --only-new-pages.")
+    logging.basicConfig(
+        level=logging.WARNING if args.silent else logging.INFO,
+        format="%(message)s",
+    )
 
     if not args.url.endswith("/"):
         args.url += "/"
 
     try:
-        if args.threaded:
+        if args.async_:
+            # Imported here so aiohttp is only needed in async mode
+            import async_miner
+
+            print("Fetching in async mode.")
+            last_page = async_miner.fetch_and_save_all_pages_async(  # type: ignore  # noqa
+                base_url=args.url,
+                working_dir=args.path,
+                concurrency=args.workers,
+            )
+        elif args.threaded:
             print("Fetching in threaded mode.")
             if args.only_new_pages:
                 print("Only new pages: activated.")
-                miner.fetch_new_pages(  # type: ignore
-                    args.url, working_dir=args.path, threaded=args.threaded
+                last_page = miner.fetch_new_pages(  # type: ignore
+                    args.url,
+                    working_dir=args.path,
+                    threaded=args.threaded,
+                    workers=args.workers,
                 )
             else:
-                miner.fetch_and_save_all_pages_concurrently(
-                    base_url=args.url, working_dir=args.path
+                last_page = miner.fetch_and_save_all_pages_concurrently(
+                    base_url=args.url,
+                    working_dir=args.path,
+                    workers=args.workers,
                 )
         else:
             print(
@@ -84,18 +122,19 @@ if __name__ == "__main__":
             )
             if args.only_new_pages:
                 print("Only new pages: activated.")
-                miner.fetch_new_pages(  # type: ignore
+                last_page = miner.fetch_new_pages(  # type: ignore
                     args.url, working_dir=args.path, threaded=args.threaded
                 )
-            miner.fetch_and_save_all_pages_linearly(
-                base_url=args.url,
-                working_dir=args.path,
-            )
+            else:
+                last_page = miner.fetch_and_save_all_pages_linearly(
+                    base_url=args.url,
+                    working_dir=args.path,
+                )
     except KeyboardInterrupt:
         print("Cancelled due to KeyboardInterrupt.")
         sys.exit(1)
 
     print(
-        f"Fetched and saved {miner.get_last_page(args.url)} pages into "
+        f"Fetched and saved {last_page} pages into "
         f"{args.path.resolve()}."
     )
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Iterable
+
+import aiohttp
+
+from miner import (
+    get_file_path_for_page,
+    get_page_from_url,
+    get_url_for_page,
+    write_page,
+)
+
+logger = logging.getLogger("uw_miner")
+
+
+def _make_session(concurrency: int) -> aiohttp.ClientSession:
+    """Creates a client session whose connector allows at most
+    `concurrency` open connections.
+
+    Args:
+        concurrency (int): The maximum amount of simultaneous connections.
+
+    Returns:
+        aiohttp.ClientSession: The newly created session.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=concurrency, limit_per_host=concurrency, ttl_dns_cache=300
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={"User-Agent": "uw-stats"},
+        timeout=aiohttp.ClientTimeout(connect=5, sock_read=30),
+    )
+
+
+async def fetch_page_async(
+    session: aiohttp.ClientSession, url: str
+) -> bytes:
+    """Fetches a webpage and returns the raw HTML content.
+
+    Args:
+        session (aiohttp.ClientSession): The session used for the request.
+        url (str): The URL to the webpage.
+
+    Returns:
+        bytes: The raw HTML content, undecoded.
+    """
+    async with session.get(url) as response:
+        return await response.read()
+
+
+async def get_last_page_async(
+    session: aiohttp.ClientSession, base_url: str, max: int = 1_000_000
+) -> int:
+    """Finds the last page of a given thread. Does it by requesting
+    an unlikely large page number and watching the redirect. Only the
+    headers are requested as the body isn't needed.
+
+    Args:
+        session (aiohttp.ClientSession): The session used for the request.
+        base_url (str): The base url to the thread.
+        max (int, optional): The max value of pages the thread is expected to
+        have. Defaults to 1_000_000.
+
+    Returns:
+        int: The max page's number.
+    """
+    url = get_url_for_page(base_url, max)
+    async with session.head(url, allow_redirects=True) as response:
+        return get_page_from_url(str(response.url))
+
+
+async def fetch_and_save_async(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
+    url: str,
+    file_path: Path,
+    page_num: int,
+) -> None:
+    """Fetches the page behind the given url and writes it to a file.
+    Writing the file happens in the default executor so the event loop
+    isn't blocked by disk I/O.
+
+    Args:
+        session (aiohttp.ClientSession): The session used for the request.
+        semaphore (asyncio.Semaphore): Limits the pages in flight.
+        url (str): The page url.
+        file_path (Path): The file to write to.
+        page_num (int): The page number.
+    """
+    async with semaphore:
+        html = await fetch_page_async(session, url)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, write_page, html, file_path)
+    logger.info("Saved page %d.", page_num)
+
+
+async def fetch_and_save_pages_async(
+    base_url: str,
+    pages: Iterable,
+    working_dir: Path | str = Path.cwd(),
+    concurrency: int = 50,
+) -> None:
+    """Fetches and saves specified pages of a thread on a single event loop.
+
+    Args:
+        base_url (str): The threads base url.
+        pages (Iterable): An iterable of pages to be fetched and saved.
+        working_dir (Path | str, optional): The directory where the files
+        are created. Defaults to Path.cwd().
+        concurrency (int, optional): The maximum amount of pages fetched at
+        the same time. Defaults to 50.
+    """
+    working_dir = Path(working_dir)
+    assert working_dir.is_dir(), "path arg must be a directory."
+    semaphore = asyncio.Semaphore(concurrency)
+    async with _make_session(concurrency) as session:
+        await asyncio.gather(*[
+            fetch_and_save_async(
+                session,
+                semaphore,
+                get_url_for_page(base_url, page),
+                get_file_path_for_page(working_dir, page),
+                page,
+            )
+            for page in pages
+        ])
+
+
+async def fetch_and_save_all_async(
+    base_url: str, working_dir: Path | str = Path.cwd(), concurrency: int = 50
+) -> int:
+    """Fetches and saves all pages of a thread on a single event loop.
+
+    Args:
+        base_url (str): The threads base url.
+        working_dir (Path | str, optional): The directory where the files
+        are created. Defaults to Path.cwd().
+        concurrency (int, optional): The maximum amount of pages fetched at
+        the same time. Defaults to 50.
+
+    Returns:
+        int: The last page's number.
+    """
+    async with _make_session(1) as session:
+        last_page = await get_last_page_async(session, base_url)
+
+    await fetch_and_save_pages_async(
+        base_url=base_url,
+        pages=range(1, last_page + 1),
+        working_dir=working_dir,
+        concurrency=concurrency,
+    )
+    return last_page
+
+
+def fetch_and_save_all_pages_async(
+    base_url: str, working_dir: Path | str = Path.cwd(), concurrency: int = 50
+) -> int:
+    """Synchronous entry point running `fetch_and_save_all_async()`.
+
+    Args:
+        base_url (str): The threads base url.
+        working_dir (Path | str, optional): The directory where the files
+        are created. Defaults to Path.cwd().
+        concurrency (int, optional): The maximum amount of pages fetched at
+        the same time. Defaults to 50.
+
+    Returns:
+        int: The last page's number.
+    """
+    return asyncio.run(fetch_and_save_all_async(
+        base_url, working_dir=working_dir, concurrency=concurrency
+    ))
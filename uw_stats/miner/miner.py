@@ -1,21 +1,65 @@
+import functools
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from threading import Thread
 from typing import Iterable
 import re
 
 import requests
-
-VERBOSE = True
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("uw_miner")
+
+_PAGE_RE = re.compile(r"page-(\d+)/?(?:[?#].*)?$")
+_PAGE_FILE_RE = re.compile(r"page_(\d+)\.html")
+
+# A single session shared by all fetches, so connections to the forum are
+# kept alive and pooled instead of being re-established for every page.
+# The pool is larger than the default worker count and blocks instead of
+# opening throwaway connections, so every connection (and its DNS lookup and
+# TLS handshake) is made once and reused for the whole run.
+_SESSION = requests.Session()
+_SESSION.headers["User-Agent"] = "uw-stats"
+_ADAPTER = HTTPAdapter(
+    pool_connections=64,
+    pool_maxsize=64,
+    pool_block=True,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[429, 500, 502, 503, 504],
+    ),
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+# (connect timeout, read timeout) in seconds
+TIMEOUT = (5, 30)
+CHUNK_SIZE = 65536
+WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB
 
 
 def set_verbose(value: bool = True):
-    global VERBOSE
-    VERBOSE = value
+    logger.setLevel(logging.INFO if value else logging.WARNING)
+
+
+def get_session() -> requests.Session:
+    """Returns the session used for all HTTP requests of the miner.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    return _SESSION
 
 
 def fetch_new_pages(
-    base_url: str, working_dir: Path | str = Path.cwd(), threaded: bool = True
-) -> None:
+    base_url: str,
+    working_dir: Path | str = Path.cwd(),
+    threaded: bool = True,
+    workers: int = 16,
+) -> int:
     """Fetches only pages that aren't present yet. Useful for quickly updating
     the underlying data. Updates the latest saved page as well.
 
@@ -23,36 +67,49 @@ def fetch_new_pages(
         base_url (str): The threads base url.
         working_dir (Path | str, optional): The directory where files are
         created. Defaults to Path.cwd().
+        workers (int, optional): The maximum amount of pages fetched at the
+        same time. Defaults to 16.
+
+    Returns:
+        int: The last page's number.
     """
     working_dir = Path(working_dir)
-    try:
-        last_available_page_path = sorted(
-            [i for i in working_dir.iterdir() if i.is_file()]
-        )[-1]
-    except IndexError:
+    last_available_page = max(
+        (
+            int(match.group(1))
+            for i in working_dir.iterdir()
+            if (match := _PAGE_FILE_RE.fullmatch(i.name)) and i.is_file()
+        ),
+        default=None,
+    )
+    if last_available_page is None:
         raise ValueError("Working dir is empty, use a different function for "
                          "downloading all pages together.")
-    last_available_page = int(re.findall(
-        r"\d+", last_available_page_path.name)[0]
-    )
     last_page = get_last_page(base_url)
 
     fetch_and_save_pages_concurrently(
         base_url=base_url,
         pages=range(last_available_page, last_page + 1),
         working_dir=working_dir,
+        workers=workers,
     )
+    return last_page
 
 
 def fetch_and_save_all_pages_concurrently(
-    base_url: str, working_dir: Path | str = Path.cwd()
-) -> None:
+    base_url: str, working_dir: Path | str = Path.cwd(), workers: int = 16
+) -> int:
     """Fetches and saves all pages of a thread concurrently.
 
     Args:
         base_url (str): The threads base url.
         working_dir (Path | str, optional): The directory where the files
         are created. Defaults to Path.cwd().
+        workers (int, optional): The maximum amount of pages fetched at the
+        same time. Defaults to 16.
+
+    Returns:
+        int: The last page's number.
     """
     last_page = get_last_page(base_url)
 
@@ -60,43 +117,49 @@ def fetch_and_save_all_pages_concurrently(
         base_url=base_url,
         pages=range(1, last_page + 1),
         working_dir=working_dir,
+        workers=workers,
     )
+    return last_page
 
 
 def fetch_and_save_pages_concurrently(
-    base_url: str, pages: Iterable, working_dir: Path | str = Path.cwd()
+    base_url: str,
+    pages: Iterable,
+    working_dir: Path | str = Path.cwd(),
+    workers: int = 16,
 ) -> None:
-    """Fetches and saves specified pages of a thread concurrently.
+    """Fetches and saves specified pages of a thread concurrently using a
+    bounded pool of worker threads.
 
     Args:
         base_url (str): The threads base url.
         pages (Iterable): An iterable of pages to be fetched and saved.
         working_dir (Path | str, optional): The directory where the files
         are created. Defaults to Path.cwd().
+        workers (int, optional): The maximum amount of pages fetched at the
+        same time. Defaults to 16.
     """
-    threads = []
-    for page in pages:
-        thread = Thread(
-            target=fetch_and_save,
-            name=f"UW-Stats fetch thread #{page}",
-            args=(get_url_for_page(base_url, page), Path(working_dir), page),
-        )
-        thread.start()
-        threads.append(thread)
-
-    for thread in threads:
-        thread.join()
+    pages = list(pages)
+    urls, file_paths = _prepare_pages(base_url, pages, working_dir)
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="UW-Stats fetch thread"
+    ) as executor:
+        # Consume the results so exceptions of the workers are raised here.
+        list(executor.map(_fetch_and_write, urls, file_paths, pages))
 
 
 def fetch_and_save_all_pages_linearly(
     base_url: str, working_dir: Path | str = Path.cwd()
-) -> None:
+) -> int:
     """Fetches and saves all pages of a thread linearly.
 
     Args:
         base_url (str): The threads base url.
         working_dir (Path | str, optional): The directory where the files
         are created. Defaults to Path.cwd().
+
+    Returns:
+        int: The last page's number.
     """
     last_page = get_last_page(base_url)
 
@@ -105,6 +168,7 @@ def fetch_and_save_all_pages_linearly(
         pages=range(1, last_page + 1),
         working_dir=working_dir,
     )
+    return last_page
 
 
 def fetch_and_save_pages_linearly(
@@ -118,10 +182,32 @@ def fetch_and_save_pages_linearly(
         working_dir (Path | str, optional): The directory where the files
         are created. Defaults to Path.cwd().
     """
-    for page in pages:
-        fetch_and_save(
-            get_url_for_page(base_url, page), Path(working_dir), page
-        )
+    pages = list(pages)
+    urls, file_paths = _prepare_pages(base_url, pages, working_dir)
+    for url, file_path, page in zip(urls, file_paths, pages):
+        _fetch_and_write(url, file_path, page)
+
+
+def _prepare_pages(
+    base_url: str, pages: list[int], working_dir: Path | str
+) -> tuple[list[str], list[Path]]:
+    """Builds the urls and file paths for a list of pages up front, so the
+    fetching loops don't need to do it per page.
+
+    Args:
+        base_url (str): The threads base url.
+        pages (list[int]): The pages to be fetched and saved.
+        working_dir (Path | str): The directory where the files are created.
+
+    Returns:
+        tuple[list[str], list[Path]]: The urls and file paths, in the same
+        order as the pages.
+    """
+    working_dir = Path(working_dir)
+    assert working_dir.is_dir(), "path arg must be a directory."
+    urls = [get_url_for_page(base_url, page) for page in pages]
+    file_paths = [get_file_path_for_page(working_dir, page) for page in pages]
+    return urls, file_paths
 
 
 def fetch_and_save(url: str, working_dir: Path, page_num: int) -> None:
@@ -132,15 +218,98 @@ def fetch_and_save(url: str, working_dir: Path, page_num: int) -> None:
         working_dir (Path): The directory where the files are created.
         page_num (int): The page number.
     """
-    html = fetch_page(url)
-    save_page(html, working_dir, page_num)
-    if VERBOSE:
-        print(f"Saved page {page_num}.")
+    _fetch_and_write(
+        url, get_file_path_for_page(working_dir, page_num), page_num
+    )
+
+
+def _fetch_and_write(url: str, file_path: Path, page_num: int) -> None:
+    """Fetches the page behind the given url and writes it to `file_path`.
+    If the page has been saved before, a conditional request is made and
+    the file is left untouched if the server reports it as unchanged.
+
+    Args:
+        url (str): The page url.
+        file_path (Path): The file to write to.
+        page_num (int): The page number.
+    """
+    meta_path = get_meta_path_for_page(file_path)
+    headers = _get_conditional_headers(file_path, meta_path)
+    # Stream the body straight to disk instead of materializing it first.
+    with _SESSION.get(
+        url, headers=headers, stream=True, timeout=TIMEOUT
+    ) as response:
+        if response.status_code == 304:
+            logger.info("Page %d is unchanged.", page_num)
+            return
+        # Drop the old validators first, they must not outlive a failed
+        # write of the page they belong to.
+        meta_path.unlink(missing_ok=True)
+        write_page(response.iter_content(chunk_size=CHUNK_SIZE), file_path)
+        if response.status_code == 200:
+            _write_meta(meta_path, response)
+    logger.info("Saved page %d.", page_num)
+
+
+def get_meta_path_for_page(file_path: Path) -> Path:
+    """Generates the path of the file storing the caching headers of a
+    saved page.
+
+    Args:
+        file_path (Path): The path to the page's HTML file.
+
+    Returns:
+        Path: The path to the JSON metadata file.
+    """
+    return file_path.with_name(file_path.name + ".meta.json")
+
+
+def _get_conditional_headers(
+    file_path: Path, meta_path: Path
+) -> dict[str, str]:
+    """Builds the headers for a conditional request from the metadata
+    stored alongside a saved page.
+
+    Args:
+        file_path (Path): The path to the page's HTML file.
+        meta_path (Path): The path to the page's metadata file.
+
+    Returns:
+        dict[str, str]: The headers, empty if the page isn't saved yet.
+    """
+    if not file_path.is_file():
+        return {}
+    try:
+        meta = json.loads(meta_path.read_text("utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def _write_meta(meta_path: Path, response: requests.Response) -> None:
+    """Stores the caching headers of a response next to the saved page.
+
+    Args:
+        meta_path (Path): The path to the page's metadata file.
+        response (requests.Response): The response the page was read from.
+    """
+    meta = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    meta_path.write_text(json.dumps(meta), "utf-8")
 
 
+@functools.lru_cache(maxsize=32)
 def get_last_page(base_url: str, max: int = 1_000_000) -> int:
     """Finds the last page of a given thread. Does it by requesting
-    an unlikely large page number and watching the redirect.
+    an unlikely large page number and watching the redirect. Only the
+    headers are requested as the body isn't needed. Results are cached.
 
     Args:
         base_url (str): The base url to the thread.
@@ -151,11 +320,13 @@ def get_last_page(base_url: str, max: int = 1_000_000) -> int:
         int: The max page's number.
     """
     url = get_url_for_page(base_url, max)
-    last_page_url = requests.get(url).url
+    last_page_url = _SESSION.head(
+        url, allow_redirects=True, timeout=TIMEOUT
+    ).url
     return get_page_from_url(last_page_url)
 
 
-def get_page_from_url(url: str, max: int = 1_000_000) -> int:
+def get_page_from_url(url: str) -> int:
     """Extracts the page number from a thread url.
 
     Args:
@@ -164,17 +335,10 @@ def get_page_from_url(url: str, max: int = 1_000_000) -> int:
     Returns:
         int: The page number.
     """
-    # Get the number at the end of the url
-    # Too lazy for regexp :|
-    if url[-1] == "/":  # No page indicator (first page)
+    match = _PAGE_RE.search(url)
+    if match is None:  # No page indicator (first page)
         return 1
-
-    num = ""
-    for i in range(1, max):
-        if not (n := url[-i]).isdigit():
-            break
-        num += n
-    return int(num[::-1])
+    return int(match.group(1))
 
 
 def get_url_for_page(base_url: str, page_num: int) -> str:
@@ -191,31 +355,102 @@ def get_url_for_page(base_url: str, page_num: int) -> str:
     return base_url + f"page-{page_num}/"
 
 
-def fetch_page(url: str) -> str:
-    """Fetches a webpage and returns the raw HTML content using requests.get().
+def fetch_page(url: str) -> bytes:
+    """Fetches a webpage and returns the raw HTML content using the shared
+    session.
 
     Args:
         url (str): The URL to the webpage.
 
     Returns:
-        str: The raw HTML content.
+        bytes: The raw HTML content, undecoded.
     """
-    response = requests.get(url)
-    return response.text
+    response = _SESSION.get(url, timeout=TIMEOUT)
+    return response.content
 
 
-def save_page(html: str, working_dir: Path, page_num: int = 1) -> int:
-    """Saves a given page to an HTML file.
+def save_page(
+    html: bytes | Iterable[bytes], working_dir: Path, page_num: int = 1
+) -> int:
+    """Saves a given page to an HTML file. The content is written as is,
+    without decoding and re-encoding it. `working_dir` must exist, it isn't
+    checked per page.
 
     Args:
-        html (str): The raw HTML content.
+        html (bytes | Iterable[bytes]): The raw HTML content, either at once
+        or as an iterable of chunks (e.g. `Response.iter_content()`).
         working_dir (Path): The directory where the file will be saved.
         page_num (int, optional): The page number. Defaults to 1.
 
     Returns:
         int: The amount of bytes written.
     """
-    assert working_dir.is_dir(), "path arg must be a directory."
-    file_path = working_dir / f"page_{str(page_num).zfill(4)}.html"
-    with open(file_path, mode="w", encoding="utf-8") as fp:
-        return fp.write(html)
+    return write_page(html, get_file_path_for_page(working_dir, page_num))
+
+
+def write_page(html: bytes | Iterable[bytes], file_path: Path) -> int:
+    """Writes a given page to a file. Chunks are written to a temporary
+    `.part` file first, which only replaces `file_path` once all of them
+    arrived, so a broken connection doesn't destroy a previously saved page.
+
+    Args:
+        html (bytes | Iterable[bytes]): The raw HTML content, either at once
+        or as an iterable of chunks (e.g. `Response.iter_content()`).
+        file_path (Path): The file to write to.
+
+    Returns:
+        int: The amount of bytes written.
+    """
+    if isinstance(html, bytes):
+        return _write_bytes(html, file_path)
+    part_path = file_path.with_name(file_path.name + ".part")
+    written = 0
+    try:
+        with open(part_path, mode="wb", buffering=WRITE_BUFFER_SIZE) as fp:
+            for chunk in html:
+                written += fp.write(chunk)
+        os.replace(part_path, file_path)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+    return written
+
+
+def _write_bytes(data: bytes, file_path: Path) -> int:
+    """Writes the whole content of a file at once using the OS-level file
+    API, bypassing Python's buffered file objects. Usually a single
+    os.write() call suffices.
+
+    Args:
+        data (bytes): The data to write.
+        file_path (Path): The file to write to.
+
+    Returns:
+        int: The amount of bytes written.
+    """
+    fd = os.open(
+        file_path,
+        os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+        0o644,
+    )
+    try:
+        view = memoryview(data)
+        written = 0
+        while written < len(view):  # Short writes are rare but possible
+            written += os.write(fd, view[written:])
+        return written
+    finally:
+        os.close(fd)
+
+
+def get_file_path_for_page(working_dir: Path, page_num: int) -> Path:
+    """Generates the path of the file a page is saved to.
+
+    Args:
+        working_dir (Path): The directory where the files are saved.
+        page_num (int): The page number.
+
+    Returns:
+        Path: The path to the HTML file.
+    """
+    return working_dir / f"page_{page_num:04d}.html"
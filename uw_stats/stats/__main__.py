@@ -3,9 +3,6 @@ import sys
 from pathlib import Path
 from typing import Any
 
-import scraper
-import stats
-
 
 def parse_range(rangestring: str) -> range:
     """Parses a special range string.
@@ -24,6 +21,30 @@ def parse_range(rangestring: str) -> range:
     return range(*nums)
 
 
+def _get_format_options() -> list[str]:
+    """Lists the public methods of `stats.DataVisualizer`, which are the
+    possible visualization formats. Imports `stats` (and thereby pandas).
+
+    Returns:
+        list[str]: The format names.
+    """
+    import stats
+
+    return [i for i in dir(stats.DataVisualizer) if not i.startswith("_")]
+
+
+def _format_options(options: list[str]) -> str:
+    """Formats the visualization formats for displaying them to the user.
+
+    Args:
+        options (list[str]): The format names.
+
+    Returns:
+        str: The comma separated, backtick quoted format names.
+    """
+    return ", ".join(f"`{i}`" for i in options)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         prog="uw-stats",
@@ -32,19 +53,14 @@ if __name__ == "__main__":
         epilog="Don't forget playing on uwmc.de!",
     )
 
-    visualization_format_options = [
-        i for i in dir(stats.DataVisualizer) if not i.startswith("_")  # type: ignore  # noqa
-    ]
-    visualization_format_options_str = ""
-    for i in visualization_format_options:
-        visualization_format_options_str += f"`{i}`, "
-    visualization_format_options_str = visualization_format_options_str[:-2]
+    # The possible formats aren't listed here, as that would require
+    # importing pandas just to print the help.
     parser.add_argument(
         "format",
         action="store",
         type=str,
-        help="The output visualization format. Possible options are: "
-             f"{visualization_format_options_str}",
+        help="The output visualization format, e.g. `maua1_style_bbtable`. "
+             "An invalid format prints all possible options.",
     )
     parser.add_argument(
         "-p",
@@ -93,9 +109,15 @@ if __name__ == "__main__":
         print("Only one *range flag allowed.")
         sys.exit(1)
 
-    if args.format not in [str(i) for i in visualization_format_options]:
+    # Heavy imports are deferred until the arguments are known to be valid.
+    import scraper
+    import stats
+
+    visualization_format_options = _get_format_options()
+    if args.format not in visualization_format_options:
         print("Format positional argument should be one of "
-              f"{visualization_format_options_str}")
+              f"{_format_options(visualization_format_options)}")
+        sys.exit(1)
 
     range_arg = {}
     if args.pagerange:
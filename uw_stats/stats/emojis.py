@@ -1,10 +1,7 @@
 import emoji
 
-EMOJI_LIST = list(emoji.EMOJI_DATA.keys())
+EMOJI_SET: frozenset[str] = frozenset(emoji.EMOJI_DATA.keys())
 
 
 def is_emoji(string: str) -> bool:
-    try:
-        return string in EMOJI_LIST
-    except IndexError:  # Empty string
-        return False
+    return string in EMOJI_SET
@@ -2,19 +2,22 @@
 # https://github.com/ifscript/lootscript.
 # This notice is also found at the top of affected functions.
 
-import copy
 import datetime as dt
+import functools
+import itertools
 import math
+import os
 import string
-import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
-import bs4
-import dateparser
+import lxml.html
 import pandas as pd
 import regex as re
 from emojis import is_emoji
+from lxml import etree
 
 WHITESPACES = r"\xad͏\u061cᅟᅠ឴឵\u180e\u2000\u2001\u2002\u2003\u2004\u2005"\
               r"\u2006"\
@@ -23,8 +26,118 @@ WHITESPACES = r"\xad͏\u061cᅟᅠ឴឵\u180e\u2000\u2001\u2002\u2003\u2004\u20
               r"\u206f\u3000\ufeff"\
               r"\ufe0f\ufe0f"\
 
-# bs4 seems to recursively parse the html. Errors sometimes.
-sys.setrecursionlimit(10_000)
+
+
+# The columns of the dataframe. Rows are tuples in this order.
+COLUMNS = [
+    "post_num",
+    "page_num",
+    "author",
+    "creation_datetime",
+    "content",
+    "like_count",
+    "quote_count",
+    "quoted_list",
+    "spoiler_count",
+    "mentions_count",
+    "mentioned_list",
+    "word_count",
+    "emoji_count",
+    "emoji_frequency_mapping",
+    "is_edited",
+    "is_rules_compliant",
+    "rulebreak_reasons",
+]
+# The pages are always UTF-8. Without an explicit encoding libxml2 would
+# rely on the page's meta tag and fall back to Latin-1 if it is missing.
+_HTML_PARSER = lxml.html.HTMLParser(encoding="utf-8")
+
+
+def _has_class(class_: str) -> str:
+    """Builds an XPath predicate matching elements having a given class,
+    like CSS's `.class` selector.
+
+    Args:
+        class_ (str): The class name.
+
+    Returns:
+        str: The XPath predicate expression.
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_} ')"
+
+
+_DIGITS_RE = re.compile(r"\d+")
+# Maps every ASCII punctuation character to a space.
+_PUNCTUATION_TO_SPACE = str.maketrans(
+    {char: " " for char in string.punctuation}
+)
+
+# Classes identifying the message features. Shared by the XPath helpers
+# and _extract_features(), so both always look at the same elements.
+_QUOTE_CLASS = "bbCodeBlock--quote"
+_SPOILER_CLASS = "bbCodeSpoiler"
+_USERNAME_CLASS = "username"
+_EMOJI_CLASS = "smilie"
+_LASTEDIT_CLASS = "message-lastEdit"
+_TIME_CLASS = "u-dt"
+_REACT_BAR_CLASS = "reactionsBar-link"
+
+# XPath expressions are compiled once and evaluated in C.
+_MESSAGES_XP = etree.XPath(f"//article[{_has_class('message')}]")
+_CONTENT_XP = etree.XPath(f"(.//div[{_has_class('message-content')}])[1]")
+_LI_XP = etree.XPath(".//li")
+_QUOTES_XP = etree.XPath(f".//blockquote[{_has_class(_QUOTE_CLASS)}]")
+_SPOILERS_XP = etree.XPath(f".//div[{_has_class(_SPOILER_CLASS)}]")
+# There can also be other anchor tags with that class, but only mentions
+# start with @.
+_MENTION_PRED = (
+    f"{_has_class(_USERNAME_CLASS)}"
+    " and starts-with(normalize-space(string(.)), '@')"
+)
+_MENTIONS_XP = etree.XPath(f".//a[{_MENTION_PRED}]")
+_IS_MENTION_XP = etree.XPath(f"boolean(self::a[{_MENTION_PRED}])")
+_EMOJIS_XP = etree.XPath(f".//img[{_has_class(_EMOJI_CLASS)}]")
+_LASTEDIT_XP = etree.XPath(f".//div[{_has_class(_LASTEDIT_CLASS)}]")
+_TIME_XP = etree.XPath(
+    f".//time[{_has_class(_TIME_CLASS)}]/@datetime", smart_strings=False
+)
+_REACT_BAR_XP = etree.XPath(
+    f"(.//a[{_has_class(_REACT_BAR_CLASS)}])[1]"
+)
+# Username <bdi>s and the remaining text in one go, in document order
+_LIKES_XP = etree.XPath(
+    ".//bdi | .//text()[not(ancestor::bdi)]", smart_strings=False
+)
+# Everything clean_noisy_tags() touches, in document order: emoji images,
+# candidates for the "Ansehen auf" media paragraph (unless an emoji would
+# change their text) and tags whose content isn't part of the message.
+_NOISY_XP = etree.XPath(
+    f".//img[{_has_class(_EMOJI_CLASS)}]"
+    " | .//p[contains(., 'Ansehen')"
+    f" and not(.//img[{_has_class(_EMOJI_CLASS)} and @alt])]"
+    " | .//script | .//table | .//blockquote"
+    f" | .//div[{_has_class(_LASTEDIT_CLASS)}]"
+)
+# The tags _extract_features() looks at.
+_FEATURE_TAGS = ("blockquote", "div", "a", "img", "time")
+# Like bs4, script and style contents aren't considered text.
+_TEXT_XP = etree.XPath(
+    ".//text()[not(ancestor::script) and not(ancestor::style)]",
+    smart_strings=False,
+)
+
+
+def _get_text(element: lxml.html.HtmlElement) -> str:
+    """Concatenates all stripped text pieces of an element, like
+    bs4's `get_text(strip=True)`.
+
+    Args:
+        element (lxml.html.HtmlElement): The element.
+
+    Returns:
+        str: The text.
+    """
+    return "".join(text.strip() for text in _TEXT_XP(element))
 
 
 def get_page_for_message(post_num: int) -> int:
@@ -63,28 +176,33 @@ def get_last_post_from_page(page_num: int) -> int:
     return page_num * 20
 
 
-def find_all_messages(soup: bs4.BeautifulSoup) -> list[bs4.element.Tag]:
-    """Returns a list of message article tags.
+def find_all_messages(
+    tree: lxml.html.HtmlElement
+) -> list[lxml.html.HtmlElement]:
+    """Returns a list of message article elements.
 
     Args:
-        soup (bs4.BeautifulSoup): The BeautifulSoup object of the HTML page.
+        tree (lxml.html.HtmlElement): The root element of the HTML page.
 
     Returns:
-        list[bs4.element.Tag]: The list containing the message article tags.
+        list[lxml.html.HtmlElement]: The list containing the message article
+        elements.
     """
-    return soup.find_all("article", class_="message")
+    return _MESSAGES_XP(tree)
 
 
-def find_message_content(message: bs4.element.Tag) -> bs4.element.Tag:
+def find_message_content(
+    message: lxml.html.HtmlElement
+) -> lxml.html.HtmlElement:
     """Retrieves the content from a message.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
-        bs4.element.Tag: The message content's element tag object.
+        lxml.html.HtmlElement: The message content's element.
     """
-    return message.find("div", class_="message-content")
+    return _CONTENT_XP(message)[0]
 
 
 def construct_dataframe(
@@ -110,34 +228,21 @@ def construct_dataframe(
     if all([pagerange, postrange]):
         raise ValueError("Only one *range parameter can be given.")
 
-    columns = [
-        "post_num",
-        "page_num",
-        "author",
-        "creation_datetime",
-        "content",
-        "like_count",
-        "quote_count",
-        "quoted_list",
-        "spoiler_count",
-        "mentions_count",
-        "mentioned_list",
-        "word_count",
-        "emoji_count",
-        "emoji_frequency_mapping",
-        "is_edited",
-        "is_rules_compliant",
-        "rulebreak_reasons",
-    ]
-
-    series_list = []
-    for file in sorted(
-        Path(path).iterdir(), key=lambda s: re.findall(r"\d+", s.name)[0]
-    ):
-        if file.is_dir():
-            continue
-        page_num = int(re.findall(r"\d+", file.name)[0])
-
+    files: list[Path] = []
+    page_nums: list[int] = []
+    # Extract every page number once and sort numerically.
+    # The miner stores metadata files next to the pages, skip them.
+    numbered_files = sorted(
+        (
+            (int(match.group()), file)
+            for file in Path(path).iterdir()
+            if file.suffix == ".html"
+            and (match := _DIGITS_RE.search(file.name))
+            and not file.is_dir()
+        ),
+        key=lambda item: item[0],
+    )
+    for page_num, file in numbered_files:
         # range checks
         if pagerange:
             if page_num not in pagerange:
@@ -149,83 +254,18 @@ def construct_dataframe(
             ):
                 continue
 
-        print("Processing", file)
-        soup = bs4.BeautifulSoup(
-            file.read_text("utf-8"), features="html.parser"
-        )
+        files.append(file)
+        page_nums.append(page_num)
 
-        for message in find_all_messages(soup):
-            post_num = get_post_num(message)
-            if postrange:
-                if post_num not in postrange:
-                    continue
-            # Some data-gathering functions need access to otherwise
-            # noisy tags.
-            # Every function tries to access the unmodified message by
-            # default, unless it needs to work with content text or raw
-            # HTML. Or needs to modify the message.
-            unmodified_message = copy.copy(message)
-            content_tag = find_message_content(message)  # Can be modified
-
-            author = unmodified_message["data-author"]
-            creation_datetime = get_message_creation_time(unmodified_message)
-            is_edited = has_edited_message(unmodified_message)
-
-            quote_count = get_amount_of_quotes(unmodified_message)
-            quoted_list = get_list_of_quoted_usernames(unmodified_message)
-
-            spoiler_count = get_amount_of_spoilers(unmodified_message)
-
-            mentioned_list = get_list_of_mentioned_usernames(
-                unmodified_message
-            )
-            mentions_count = len(mentioned_list)
-
-            # Must come before insert_dot_after_last_emoji()
-            emoji_frequency_mapping = (
-                get_mapping_of_emojis_and_frequency(unmodified_message)
-            )
-            emoji_count = sum(i for i in emoji_frequency_mapping.values())
-
-            like_count = get_amount_of_likes(message)  # modifies
-
-            clean_noisy_tags(message)  # modifies
-
-            content = content_tag.get_text(strip=True)  # needs modified
-
-            word_count = get_amount_of_words(content_tag)
-
-            rules_compliance_check_result = rules_reworked(content)
-            rulebreak_reasons = [
-                k for k, v in rules_compliance_check_result.items() if not v
-            ]
-            is_rules_compliant = not rulebreak_reasons
-
-            message_series = pd.Series(
-                data=(
-                    [
-                        post_num,
-                        page_num,
-                        author,
-                        creation_datetime,
-                        content,
-                        like_count,
-                        quote_count,
-                        quoted_list,
-                        spoiler_count,
-                        mentions_count,
-                        mentioned_list,
-                        word_count,
-                        emoji_count,
-                        emoji_frequency_mapping,
-                        is_edited,
-                        is_rules_compliant,
-                        rulebreak_reasons,
-                    ]
-                ),
-                index=columns,
-            )
-            series_list.append(message_series)
+    # Parsing is CPU-bound, so the pages are spread over multiple processes.
+    # map() keeps the order of the pages.
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        rows = list(itertools.chain.from_iterable(executor.map(
+            functools.partial(_parse_file, postrange=postrange),
+            files,
+            page_nums,
+            chunksize=8,
+        )))
 
     if pagerange:
         index = range(
@@ -238,202 +278,354 @@ def construct_dataframe(
     else:
         index = None
 
-    df = pd.DataFrame(
-        series_list,
-        index=index,
-        columns=columns,
-        copy=False,
-    )
+    # Build the dataframe once instead of growing it row by row.
+    df = pd.DataFrame.from_records(rows, columns=COLUMNS)
+    if index is not None:
+        df.index = index
+    # Compact dtypes make masks and groupings run on integer codes.
+    df = df.astype({
+        "author": "category",
+        "page_num": "int32",
+        "post_num": "int32",
+        "like_count": "int32",
+        "quote_count": "int32",
+        "spoiler_count": "int32",
+        "mentions_count": "int32",
+        "word_count": "int32",
+        "emoji_count": "int32",
+        "is_edited": bool,
+        "is_rules_compliant": bool,
+    })
     return df
 
 
-def get_post_num(message: bs4.element.Tag) -> int:
+def _parse_file(
+    file: Path, page_num: int, postrange: Optional[range] = None
+) -> list[tuple]:
+    """Parses a single HTML file into one row per message. Doesn't touch
+    pandas so it can be run in a worker process.
+
+    Args:
+        file (Path): The HTML file.
+        page_num (int): The page number of the file.
+        postrange (range, optional): Only messages whose post number is in
+        this range are included. Defaults to None.
+
+    Returns:
+        list[tuple]: The rows, with values ordered like `COLUMNS`.
+    """
+    rows: list[tuple] = []
+    print("Processing", file)
+    # Let libxml2 read the file itself, it never builds a Python copy of
+    # the document.
+    tree = lxml.html.parse(str(file), parser=_HTML_PARSER).getroot()
+    if tree is None:  # Empty file, e.g. an interrupted download
+        return rows
+
+    for message in find_all_messages(tree):
+        post_num = get_post_num(message)
+        if postrange:
+            if post_num not in postrange:
+                continue
+        content_tag = find_message_content(message)  # Will be modified
+
+        author = message.get("data-author")
+
+        # Some features need access to otherwise noisy tags. They're
+        # collected in one traversal and must be gathered before
+        # clean_noisy_tags() modifies the message.
+        features = _extract_features(message)
+        creation_datetime = features["creation_datetime"]
+        is_edited = features["is_edited"]
+        quoted_list = features["quoted_list"]
+        quote_count = len(quoted_list)
+        spoiler_count = features["spoiler_count"]
+        mentioned_list = features["mentioned_list"]
+        mentions_count = len(mentioned_list)
+        emoji_frequency_mapping = features["emoji_frequency_mapping"]
+        emoji_count = sum(emoji_frequency_mapping.values())
+        like_count = features["like_count"]
+
+        clean_noisy_tags(message)  # modifies
+
+        content = _get_text(content_tag)  # needs modified
+
+        word_count = get_amount_of_words(content_tag)
+
+        rules_compliance_check_result = rules_reworked(content)
+        rulebreak_reasons = [
+            k for k, v in rules_compliance_check_result.items() if not v
+        ]
+        is_rules_compliant = not rulebreak_reasons
+
+        rows.append((
+            post_num,
+            page_num,
+            author,
+            creation_datetime,
+            content,
+            like_count,
+            quote_count,
+            quoted_list,
+            spoiler_count,
+            mentions_count,
+            mentioned_list,
+            word_count,
+            emoji_count,
+            emoji_frequency_mapping,
+            is_edited,
+            is_rules_compliant,
+            rulebreak_reasons,
+        ))
+    return rows
+
+
+def _extract_features(message: lxml.html.HtmlElement) -> dict[str, Any]:
+    """Collects all features of a message that don't depend on the cleaned
+    content in a single traversal, instead of one search per feature.
+    Produces the same values as the respective get_* functions.
+
+    Args:
+        message (lxml.html.HtmlElement): The message's element.
+
+    Returns:
+        dict[str, Any]: A mapping from the column names `creation_datetime`,
+        `is_edited`, `quoted_list`, `spoiler_count`, `mentioned_list`,
+        `emoji_frequency_mapping` and `like_count` to their values.
+    """
+    quoted_list: list[str] = []
+    spoiler_count = 0
+    mentioned_list: list[str] = []
+    emojis: Counter[str] = Counter()
+    is_edited = False
+    iso_string = None
+    likes_bar = None
+
+    for _, element in etree.iterwalk(
+        message, events=("start",), tag=_FEATURE_TAGS
+    ):
+        tag = element.tag
+        classes = element.get("class", "").split()
+        if tag == "blockquote":
+            if _QUOTE_CLASS in classes:
+                quoted_list.append(element.get("data-quote"))
+        elif tag == "div":
+            if _SPOILER_CLASS in classes:
+                spoiler_count += 1
+            if _LASTEDIT_CLASS in classes:
+                is_edited = True
+        elif tag == "a":
+            if _USERNAME_CLASS in classes and _IS_MENTION_XP(element):
+                mentioned_list.append(_get_text(element)[1:])
+            if likes_bar is None and _REACT_BAR_CLASS in classes:
+                likes_bar = element
+        elif tag == "img":
+            if _EMOJI_CLASS in classes:
+                emojis[element.get("alt")] += 1
+        elif tag == "time":
+            if iso_string is None and _TIME_CLASS in classes:
+                iso_string = element.get("datetime")
+
+    return {
+        "creation_datetime": (
+            None if iso_string is None else _parse_datetime(iso_string)
+        ),
+        "is_edited": is_edited,
+        "quoted_list": quoted_list,
+        "spoiler_count": spoiler_count,
+        "mentioned_list": mentioned_list,
+        "emoji_frequency_mapping": emojis,
+        "like_count": 0 if likes_bar is None else _count_likes(likes_bar),
+    }
+
+
+def get_post_num(message: lxml.html.HtmlElement) -> int:
     """Get the post number of a message.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
         int: The post number.
     """
-    postnum_str = message.find_all("li")[3].get_text(strip=True)[1:]
+    postnum_str = _get_text(_LI_XP(message)[3])[1:]
     return int(postnum_str.replace(".", ""))
 
 
-def get_amount_of_likes(message: bs4.element.Tag) -> int:
+def get_amount_of_likes(message: lxml.html.HtmlElement) -> int:
     """Get the amount of likes a message has.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
         int: The like count.
     """
     # Inspired by
     # https://github.com/ifscript/lootscript/blob/main/lootscript.py
-    likes_bar = message.find("a", class_="reactionsBar-link")
+    likes_bar = _REACT_BAR_XP(message)
 
-    if likes_bar is None:
+    if not likes_bar:
         # No likes found
         return 0
 
-    num_likes = len(likes_bar.find_all('bdi'))
+    return _count_likes(likes_bar[0])
+
+
+def _count_likes(likes_bar: lxml.html.HtmlElement) -> int:
+    """Counts the likes shown by a message's reactions bar.
+
+    Args:
+        likes_bar (lxml.html.HtmlElement): The reactions bar anchor element.
+
+    Returns:
+        int: The like count.
+    """
+    num_likes = 0
+    texts = []
+    for node in _LIKES_XP(likes_bar):
+        if isinstance(node, str):
+            # Ignore the usernames
+            texts.append(node.strip())
+        else:
+            num_likes += 1
 
     if num_likes < 3:
         # Can be more if num_likes is 3
         return num_likes
 
-    for bdi in likes_bar("bdi"):
-        # Remove usernames
-        bdi.decompose()
-
-    text = likes_bar.get_text(strip=True)
+    text = "".join(texts)
     try:
         # Return additional likes plus the ones being counted
-        return int(re.findall(r"\d+", text)[0]) + num_likes
+        return int(_DIGITS_RE.findall(text)[0]) + num_likes
     except IndexError:
         # There are just 3 likes
         return num_likes
 
 
-def clean_noisy_tags(message: bs4.element.Tag) -> None:
-    """Decomposes various hard-coded noisy Tags.
+def clean_noisy_tags(message: lxml.html.HtmlElement) -> None:
+    """Removes various hard-coded noisy elements. Text following a removed
+    element is kept.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
     """
-    # Turn emojis into their alt
-    for emoji in message.find_all("img", class_="smilie"):
-        try:
-            emoji.insert_after(".")  # Use emojis as Sentence delimiter
-            alt = emoji["alt"]
-            emoji.insert_before(alt)
-            emoji.decompose()
-        except (TypeError, ValueError):
-            # Rare error of a corrupted image tag (?)
-            # Just ignoring, it's all @fscript's fault.
-            pass
-
-    # Media Tags have a noisy "Ansehen auf" string.
-    for p in message.find_all("p"):
-        if p.get_text(strip=True) == "Ansehen auf":
-            p.decompose()
-
-    # Tags whose content shouldn't be in the message content.
-    # List of tuples. First tuple element is the tag string, second
-    # an optional class.
-    useless_tags: list[tuple[str, Optional[str]]] = [
-        ("script", None),
-        ("table", None),
-        ("blockquote", None),
-        ("div", "message-lastEdit")
-    ]
-    for tag, class_ in useless_tags:
-        if class_:
-            all_tags = message.find_all(tag, class_=class_)
+    for node in _NOISY_XP(message):
+        if node.tag == "img":
+            # Turn emojis into their alt
+            alt = node.get("alt")
+            if alt is None:
+                # Rare error of a corrupted image tag (?)
+                # Just ignoring, it's all @fscript's fault.
+                continue
+            # Replace the image in place by an element containing its alt,
+            # keeping the text separate from the surrounding text.
+            node.attrib.clear()
+            node.tag = "span"
+            node.text = alt + "."  # Use emojis as Sentence delimiter
+        elif node.tag == "p":
+            # Media Tags have a noisy "Ansehen auf" string.
+            if _get_text(node) == "Ansehen auf":
+                _remove_keeping_tail(node)
         else:
-            all_tags = message.find_all(tag)
-        for find in all_tags:
-            find.decompose()
+            # Tags whose content shouldn't be in the message content:
+            # script, table, blockquote and div.message-lastEdit
+            _remove_keeping_tail(node)
+
+
+def _remove_keeping_tail(element: lxml.html.HtmlElement) -> None:
+    """Removes an element's content but keeps its tail as a separate text
+    piece. drop_tree() would merge the tail into the preceding text, which
+    then gets stripped as one, unlike bs4's decompose().
+
+    Args:
+        element (lxml.html.HtmlElement): The element to remove.
+    """
+    element.clear(keep_tail=True)
+    element.tag = "span"
 
 
-def get_amount_of_quotes(message: bs4.element.Tag) -> int:
+def get_amount_of_quotes(message: lxml.html.HtmlElement) -> int:
     """Retrieves the amount of quotes of a message.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
         int: The quote count.
     """
-    return len(message.find_all("blockquote", class_="bbCodeBlock--quote"))
+    return len(_QUOTES_XP(message))
 
 
-def get_list_of_quoted_usernames(message: bs4.element.Tag) -> list[str]:
+def get_list_of_quoted_usernames(message: lxml.html.HtmlElement) -> list[str]:
     """Retrieves a list of usernames being quoted in a message.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
         list[str]: The list containing the usernames.
     """
-    usernames: list[str] = []
-    for quote in message.find_all("blockquote", class_="bbCodeBlock--quote"):
-        usernames.append(quote["data-quote"])
-    return usernames
+    return [quote.get("data-quote") for quote in _QUOTES_XP(message)]
 
 
-def get_amount_of_spoilers(message: bs4.element.Tag) -> int:
+def get_amount_of_spoilers(message: lxml.html.HtmlElement) -> int:
     """Retrieves the amount of spoilers in a message.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
         int: The spoiler count.
     """
-    return len(message.find_all("div", class_="bbCodeSpoiler"))
+    return len(_SPOILERS_XP(message))
 
 
-def get_list_of_mentioned_usernames(message: bs4.element.Tag) -> list[str]:
+def get_list_of_mentioned_usernames(
+    message: lxml.html.HtmlElement
+) -> list[str]:
     """Retrieves a list of mentioned usernames. Get the amount of mentions
     by using len() on the list.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
         list[str]: The list containing all usernames.
     """
-    usernames: list[str] = []
-    for mention in message.find_all("a", class_="username"):
-        if (uname := mention.get_text(strip=True))[0] == "@":
-            # There can also be other anchor tags with that class.
-            # However, only mentions start with @.
-            # Perf. note: str[0]=="@" performs almost 3 times faster than
-            # str.startswith("@").
-            usernames.append(uname[1:])
-    return usernames
-
-
-def get_amount_of_words(content: bs4.element.Tag) -> int:
+    return [_get_text(mention)[1:] for mention in _MENTIONS_XP(message)]
+
+
+def get_amount_of_words(content: lxml.html.HtmlElement) -> int:
     """Retrieves the amount of words in a message.
 
     Args:
-        content (bs4.element.Tag): The message content's element tag object.
+        content (lxml.html.HtmlElement): The message content's element.
 
     Returns:
         int: The word count.
     """
-    return _count_words(content.get_text(strip=True))
+    return _count_words(_get_text(content))
 
 
 def get_mapping_of_emojis_and_frequency(
-    message: bs4.element.Tag
+    message: lxml.html.HtmlElement
 ) -> dict[str, int]:
     """Returns a mapping from all occurring emojis to their frequency.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
         dict[str, int]: A mapping from all occurring emojis to their frequency.
     """
-    emojis: dict[str, int] = {}
-    for emoji in message.find_all("img", class_="smilie"):
-        alt = emoji["alt"]
-        if not emojis.get(alt):
-            emojis[alt] = 1
-            continue
-        emojis[alt] += 1
-    return emojis
+    return Counter(emoji.get("alt") for emoji in _EMOJIS_XP(message))
 
 
 def _count_words(string_: str) -> int:
     """Counts the amount of words in a string by utilizing the
-    str.split() method. Splits on any whitespace character and
-    discards empty strings.
+    str.split() method after turning punctuation into whitespace. Splits on
+    any run of whitespace and discards empty strings.
 
     Args:
         string (str): The string to count the words from.
@@ -441,23 +633,28 @@ def _count_words(string_: str) -> int:
     Returns:
         int: The amount of words in the string.
     """
-    return len(re.split(rf"[\s{string.punctuation}]", string_))
+    return len(string_.translate(_PUNCTUATION_TO_SPACE).split())
 
 
-def has_edited_message(message: bs4.element.Tag) -> bool:
+def has_edited_message(message: lxml.html.HtmlElement) -> bool:
     """Check if the message has been edited at least once.
 
     Args:
-        message (bs4.element.Tag): The message's element tag object.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
         bool: Wether or not the message has been edited.
     """
-    if message.find("div", class_="message-lastEdit"):
+    if _LASTEDIT_XP(message):
         return True
     return False
 
 
+_PUNCT_SET = frozenset(string.punctuation)
+# This needs to be done better... Needs a more comprehensive database.
+_EMOTES_TUPLE = ("-", "xD", "x.x", ":c", "o7", ":3", "q.q", ":0")
+
+
 def check_rules_compliance(
     content: str, word_count_: int
 ) -> tuple[bool, list[Optional[str]]]:
@@ -479,60 +676,65 @@ def check_rules_compliance(
     # - At least 5 words (word_count)
     # - First letter must be capitalized (first_letter)
     # - Trailing punctuation (punctuation)
-    compliance = {
-        "word_count": True,
-        "first_letter": True,
-        "punctuation": True,
-    }
-    # This needs to be done better... Needs a more comprehensive database.
-    punctuational_textual_emotes_and_symbols: list[str] = [
-        "-",
-        "xD",
-        "x.x",
-        ":c",
-        "o7",
-        ":3",
-        "q.q",
-        ":0",
-    ]
-
-    if word_count_ < 5:
-        compliance["word_count"] = False
+    word_count_ok = word_count_ >= 5
+    first_letter_ok = True
+    punctuation_ok = True
     try:
         first_letter_index = _find_first_letter_index(content)
         if first_letter_index is None:  # No letter in msg
-            compliance["first_letter"] = False
+            first_letter_ok = False
         elif not content[first_letter_index].isupper():
-            compliance["first_letter"] = False
-        if content[-1] not in string.punctuation:
-            for i in punctuational_textual_emotes_and_symbols:
-                if content.endswith(i):
-                    break
-            else:
-                compliance["punctuation"] = False
+            first_letter_ok = False
+        if content[-1] not in _PUNCT_SET:
+            punctuation_ok = content.endswith(_EMOTES_TUPLE)
     except IndexError:
         # Content is empty. Example: https://uwmc.de/p108813
-        compliance["first_letter"] = False
-        compliance["punctuation"] = False
-
-    broken_rules: list[Optional[str]] = [
-        key for key, value in compliance.items() if not value
-    ]
-    return (not any(broken_rules), broken_rules)
-
-
-def get_message_creation_time(message: bs4.element.Tag) -> dt.datetime:
+        first_letter_ok = False
+        punctuation_ok = False
+
+    if word_count_ok and first_letter_ok and punctuation_ok:
+        return (True, [])
+    broken_rules: list[Optional[str]] = []
+    if not word_count_ok:
+        broken_rules.append("word_count")
+    if not first_letter_ok:
+        broken_rules.append("first_letter")
+    if not punctuation_ok:
+        broken_rules.append("punctuation")
+    return (False, broken_rules)
+
+
+def get_message_creation_time(
+    message: lxml.html.HtmlElement
+) -> dt.datetime:
     """Retrieves a messages creation date.
 
     Args:
-        message (bs4.element.Tag): The message's element tag.
+        message (lxml.html.HtmlElement): The message's element.
 
     Returns:
         datetime.datetime: A datetime.datetime object representing the
         message's creation date.
     """
-    iso_string = message.find_all("time", class_="u-dt")[0]["datetime"]
-    return dateparser.parse(iso_string)  # type: ignore
+    return _parse_datetime(_TIME_XP(message)[0])
+
+
+def _parse_datetime(iso_string: str) -> dt.datetime:
+    """Parses the ISO 8601 timestamp of a time tag, e.g.
+    `2021-03-05T19:38:12+0100`.
+
+    Args:
+        iso_string (str): The timestamp.
+
+    Returns:
+        datetime.datetime: The timezone aware datetime.
+    """
+    try:
+        return dt.datetime.fromisoformat(iso_string)
+    except ValueError:
+        # Before Python 3.11, fromisoformat() doesn't accept offsets
+        # without a colon or a trailing Z.
+        return dt.datetime.strptime(iso_string, "%Y-%m-%dT%H:%M:%S%z")
 
 
 def _find_first_letter_index(string_: str):
@@ -545,6 +747,11 @@ def _find_first_letter_index(string_: str):
 # Source: https://de.m.wikipedia.org/wiki/Satzzeichen
 PUNCTUATION = r".?!\"„“‚‘»«‹›,;:'’–—‐\-·/\()\[\]<>{}…☞‽¡¿⸘、"
 
+# Split words by whitespace and punctuation
+_RULES_WORD_SPLIT_RE = re.compile(fr"[\s{PUNCTUATION}]")
+# Any Unicode letter, needs the third party regex module
+_LETTER_RE = re.compile(r"\p{L}", re.UNICODE)
+
 
 def rules_reworked(content: str) -> dict[str, bool]:
     content = content.strip()  # Remove trailing and leading whitespaces
@@ -564,10 +771,7 @@ def rules_reworked(content: str) -> dict[str, bool]:
     # Word count
     # Using re.split() instead of str.split() as re supports all whitespaces
     # out of the box.
-    word_count = len(re.split(
-        fr"[\s{PUNCTUATION}]",  # Split words by whitespace and punctuation
-        content,
-    ))
+    word_count = len(_RULES_WORD_SPLIT_RE.split(content))
     if word_count < 5:
         compliance["word_count"] = False
 
@@ -576,7 +780,7 @@ def rules_reworked(content: str) -> dict[str, bool]:
     # This requires the third party regex module to work
     # Therefore `import regex as re`
     # This works with all Unicode letters, including äöü, ß and âáà.
-    first_letter_match = re.search('\\p{L}', content, re.UNICODE)
+    first_letter_match = _LETTER_RE.search(content)
     if (
         first_letter_match is None  # No letter in content
         or not first_letter_match.captures()[0].isupper()  # noqa  # letter not uppercase
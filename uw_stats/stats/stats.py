@@ -1,6 +1,8 @@
-import pandas as pd
+import functools
 from typing import Optional
 
+import pandas as pd
+
 
 def mean(values: list[int | float]) -> float:
     return sum(values) / float(len(values))
@@ -53,8 +55,18 @@ class DataExtractor:
         """
         return self.df["author"].unique().tolist()
 
+    @functools.cached_property
+    def _by_author(self) -> dict[str, pd.DataFrame]:
+        """The messages of every author, split up in a single pass."""
+        return dict(tuple(
+            self.df.groupby("author", sort=False, observed=True)
+        ))
+
     def select_messages_from_author(self, author: str) -> pd.DataFrame:
-        return self.df[self.df["author"] == author]
+        try:
+            return self._by_author[author]
+        except KeyError:
+            return self.df.iloc[0:0]
 
     def get_messages_from_author(self, author: str) -> int:
         """Get the number of messages an author wrote.
@@ -71,40 +83,33 @@ class DataExtractor:
         posts = self.select_messages_from_author(author)
         return len(posts[posts["is_rules_compliant"] == False])  # noqa
 
+    def get_author_stats(self) -> pd.DataFrame:
+        """Get the message and rule violation counts of all authors,
+        computed in a single grouped pass over the dataframe.
+
+        Returns:
+            pd.DataFrame: A dataframe indexed by author, in order of first
+            appearance, with the columns `messages`, `violations` and
+            `violations_percentage` (a fraction between 0 and 1).
+        """
+        violating = ~self.df["is_rules_compliant"].astype(bool)
+        author_stats = violating.groupby(
+            self.df["author"], sort=False, observed=True
+        ).agg(messages="size", violations="sum")
+        author_stats["violations_percentage"] = (
+            author_stats["violations"] / author_stats["messages"]
+        )
+        return author_stats
+
     def get_authors_sorted_by_messages(self) -> list[str]:
-        authors = self.get_authors()
-        authors_to_messages = {}
-        for author in authors:
-            posts = self.select_messages_from_author(author)
-            authors_to_messages[author] = len(posts)
-        authors_to_messages = {
-            k: v for k, v in sorted(
-                authors_to_messages.items(),
-                key=lambda item: item[1],
-                reverse=True,
-            )
-        }
-        return list(authors_to_messages.keys())
+        return self.get_author_stats().sort_values(
+            "messages", ascending=False, kind="stable"
+        ).index.tolist()
 
     def get_author_sorted_by_rule_violations_percentage(self) -> list[str]:
-        authors = self.get_authors()
-        authors_to_rule_violations_percentage = {}
-        for author in authors:
-            posts = self.get_messages_from_author(author)
-            rule_violations = (
-                self.get_rule_violating_messages_from_author(author)
-            )
-            authors_to_rule_violations_percentage[author] = (
-                rule_violations / posts
-            )
-        authors_to_rule_violations_percentage = {
-            k: v for k, v in sorted(
-                authors_to_rule_violations_percentage.items(),
-                key=lambda item: item[1],
-                reverse=False,
-            )
-        }
-        return list(authors_to_rule_violations_percentage.keys())
+        return self.get_author_stats().sort_values(
+            "violations_percentage", kind="stable"
+        ).index.tolist()
 
 
 class DataVisualizer:
@@ -125,31 +130,29 @@ class DataVisualizer:
         Returns:
             str: The table using BBCode syntax.
         """
-        table = "\
-            [TABLE=full][TR][TD]Spieler[/TD][TD]Anzahl Beiträge[/TD]\
-            [TD]Anzahl nicht regelkonformer Beiträge[/TD]\
-            [TD]Prozentanzahl nicht regelkonformer Beiträge[/TD][/TR]"
-
-        authors_sorted = self.data_extractor.get_authors_sorted_by_messages()
-        for author in authors_sorted:
-            messages = self.data_extractor.get_messages_from_author(author)
-            rules_violating_messages = (
-                self.data_extractor.get_rule_violating_messages_from_author(
-                    author
-                )
-            )
-            percentage_rules_violating_messages = (
-                rules_violating_messages / messages
+        parts = [
+            "[TABLE=full][TR][TD]Spieler[/TD][TD]Anzahl Beiträge[/TD]"
+            "[TD]Anzahl nicht regelkonformer Beiträge[/TD]"
+            "[TD]Prozentanzahl nicht regelkonformer Beiträge[/TD][/TR]"
+        ]
+
+        author_stats = self.data_extractor.get_author_stats().sort_values(
+            "messages", ascending=False, kind="stable"
+        )
+        for (
+            author,
+            messages,
+            rules_violating_messages,
+            percentage_rules_violating_messages,
+        ) in author_stats.itertuples():
+            parts.append(
+                f"[TR][TD]{author}[/TD]"
+                f"[TD]{messages}[/TD]"
+                f"[TD]{rules_violating_messages}[/TD]"
+                f"[TD]{percentage_rules_violating_messages * 100}%[/TD][/TR]"
             )
-            table += f"\
-                [TR][TD]{author}[/TD]\
-                [TD]{messages}[/TD]\
-                [TD]{rules_violating_messages}[/TD]\
-                [TD]{percentage_rules_violating_messages * 100}%[/TD][/TR]"
-        table += "[/TABLE]"
-        table = table.replace("  ", "")
-        table = table.strip()
-        return table
+        parts.append("[/TABLE]")
+        return "".join(parts)
 
     def rule_violation_bbtable_np(self, n: int = 50) -> str:
         """
@@ -163,31 +166,27 @@ class DataVisualizer:
         Returns:
             str: The table using BBCode syntax.
         """
-        table = "\
-            [TABLE=full][TR][TD]Spieler[/TD][TD]Anzahl Beiträge[/TD]\
-            [TD]Anzahl nicht regelkonformer Beiträge[/TD]\
-            [TD]Prozentanzahl nicht regelkonformer Beiträge[/TD][/TR]"
-        authors_sorted = (
-            self.data_extractor.get_author_sorted_by_rule_violations_percentage
-        )()
-        for author in authors_sorted:
-            messages = self.data_extractor.get_messages_from_author(author)
+        parts = [
+            "[TABLE=full][TR][TD]Spieler[/TD][TD]Anzahl Beiträge[/TD]"
+            "[TD]Anzahl nicht regelkonformer Beiträge[/TD]"
+            "[TD]Prozentanzahl nicht regelkonformer Beiträge[/TD][/TR]"
+        ]
+        author_stats = self.data_extractor.get_author_stats().sort_values(
+            "violations_percentage", kind="stable"
+        )
+        for (
+            author,
+            messages,
+            rules_violating_messages,
+            percentage_rules_violating_messages,
+        ) in author_stats.itertuples():
             if messages < n:
                 continue
-            rules_violating_messages = (
-                self.data_extractor.get_rule_violating_messages_from_author(
-                    author
-                )
-            )
-            percentage_rules_violating_messages = (
-                rules_violating_messages / messages
+            parts.append(
+                f"[TR][TD]{author}[/TD]"
+                f"[TD]{messages}[/TD]"
+                f"[TD]{rules_violating_messages}[/TD]"
+                f"[TD]{percentage_rules_violating_messages * 100}%[/TD][/TR]"
             )
-            table += f"\
-                [TR][TD]{author}[/TD]\
-                [TD]{messages}[/TD]\
-                [TD]{rules_violating_messages}[/TD]\
-                [TD]{percentage_rules_violating_messages * 100}%[/TD][/TR]"
-        table += "[/TABLE]"
-        table = table.replace("  ", "")
-        table = table.strip()
-        return table
+        parts.append("[/TABLE]")
+        return "".join(parts)